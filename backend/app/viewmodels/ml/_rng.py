@@ -0,0 +1,15 @@
+"""
+Shared random number generator for the ML simulations
+Single process-wide PCG64 Generator instead of the legacy global RandomState / random module
+"""
+import numpy as np
+
+rng = np.random.default_rng()
+
+def uniform(low: float, high: float) -> float:
+    """Draw a float from [low, high)"""
+    return float(rng.uniform(low, high))
+
+def randint(low: int, high: int) -> int:
+    """Draw an int from [low, high] (inclusive, like random.randint)"""
+    return int(rng.integers(low, high, endpoint=True))
@@ -0,0 +1,47 @@
+"""
+Short-lived memoization for frequently polled ML endpoints
+Results are shared between callers for `ttl` seconds, so treat them as read-only
+"""
+import functools
+import threading
+import time
+
+def ttl_cache(ttl: float, maxsize: int = 32, key=None, should_cache=None):
+    """
+    Cache a function's results for `ttl` seconds.
+    `key` maps the call arguments to a cache key (defaults to the raw args/kwargs).
+    `should_cache` decides per result whether to store it (e.g. skip error fallbacks).
+    """
+    def decorator(func):
+        cache = {}
+        lock = threading.Lock()
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            cache_key = key(*args, **kwargs) if key else (args, tuple(sorted(kwargs.items())))
+            now = time.monotonic()
+            with lock:
+                hit = cache.get(cache_key)
+            if hit and hit[0] > now:
+                return hit[1]
+            
+            value = func(*args, **kwargs)
+            if should_cache is not None and not should_cache(value):
+                return value
+            with lock:
+                if len(cache) >= maxsize:
+                    # Drop expired entries first, then the oldest insertion
+                    for stale in [k for k, (expiry, _) in cache.items() if expiry <= now]:
+                        del cache[stale]
+                    if len(cache) >= maxsize:
+                        cache.pop(next(iter(cache)))
+                cache[cache_key] = (now + ttl, value)
+            return value
+        
+        wrapper.cache_clear = cache.clear
+        return wrapper
+    return decorator
+
+def no_error(result) -> bool:
+    """should_cache predicate: skip fallback payloads that report an upstream error"""
+    return not (isinstance(result, dict) and "error" in result)
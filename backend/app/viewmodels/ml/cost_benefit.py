@@ -3,6 +3,7 @@ AI-Powered Cost-Benefit Analysis for Climate Interventions
 Calculates ROI, payback period, and optimal intervention mix
 """
 from typing import List, Dict
+from functools import lru_cache
 import math
 from datetime import datetime
 
@@ -50,6 +51,9 @@ INTERVENTION_COSTS = {
     }
 }
 
+# Interventions priced per m² rather than per unit
+_AREA_BASED = frozenset({"reflective_paint", "green_roof"})
+
 # Economic factors
 ENERGY_COST_PER_KWH = 0.12  # USD per kWh
 CARBON_CREDIT_PRICE = 15  # USD per ton CO₂
@@ -70,6 +74,22 @@ def calculate_intervention_cba(intervention_type: str, quantity: float, area: fl
     if intervention_type not in INTERVENTION_COSTS:
         return {"error": f"Unknown intervention type: {intervention_type}"}
     
+    # Quantize inputs so near-identical requests share a cache entry
+    cba = _cba_core(intervention_type, round(quantity, 4), round(area, 4) if area else None)
+    
+    # Copy the cached result so callers can't mutate it
+    return {
+        **cba,
+        "annual_benefits": dict(cba["annual_benefits"]),
+        "annual_costs": dict(cba["annual_costs"]),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@lru_cache(maxsize=4096)
+def _cba_core(intervention_type: str, quantity: float, area: float = None) -> Dict:
+    """
+    Time-independent part of calculate_intervention_cba (memoized, treat result as read-only)
+    """
     cost_data = INTERVENTION_COSTS[intervention_type]
     
     # Determine actual quantity (use area for area-based, quantity for count-based)
@@ -132,8 +152,7 @@ def calculate_intervention_cba(intervention_type: str, quantity: float, area: fl
         "lifespan_years": lifespan,
         "co2_offset_kg_per_year": round(annual_co2_kg, 2),
         "energy_saved_kwh_per_year": round(annual_energy_kwh, 2),
-        "temp_reduction_c": round(temp_reduction, 2),
-        "timestamp": datetime.now().isoformat()
+        "temp_reduction_c": round(temp_reduction, 2)
     }
 
 def optimize_intervention_mix(budget_usd: float, priorities: List[str] = None) -> Dict:
@@ -167,9 +186,10 @@ def optimize_intervention_mix(budget_usd: float, priorities: List[str] = None) -
         "cooling_mist": 1
     }
     
+    # All sample types are known, so the cached core is used directly (no error path)
     for int_type, quantity in sample_quantities.items():
-        cba = calculate_intervention_cba(int_type, quantity, area=quantity if "paint" in int_type or "roof" in int_type else None)
-        if "error" not in cba and cba["roi_percent"] > 0:
+        cba = _cba_core(int_type, quantity, quantity if int_type in _AREA_BASED else None)
+        if cba["roi_percent"] > 0:
             intervention_rois.append({
                 "type": int_type,
                 "roi": cba["roi_percent"],
@@ -189,7 +209,7 @@ def optimize_intervention_mix(budget_usd: float, priorities: List[str] = None) -
         cost_data = INTERVENTION_COSTS[int_type]
         
         # Calculate how many units we can afford
-        if int_type in ["reflective_paint", "green_roof"]:
+        if int_type in _AREA_BASED:
             # Area-based
             affordable_area = min(remaining_budget / cost_data["installation"], sample_quantities[int_type] * 2)
             if affordable_area > 0:
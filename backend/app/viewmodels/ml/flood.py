@@ -1,9 +1,9 @@
-import random
+from app.viewmodels.ml._rng import uniform, randint
 
 def run_flood_model(rainfall_data=None, tide_data=None):
     # Simulate dynamic risk based on random factors for demo purposes
-    rainfall = random.randint(50, 200)
-    tide = round(random.uniform(0.5, 2.5), 2)
+    rainfall = randint(50, 200)
+    tide = round(uniform(0.5, 2.5), 2)
     
     risk = "Low"
     if rainfall > 150 or tide > 2.0:
@@ -5,7 +5,50 @@ Uses statistical models and simplified ML approaches for temperature, flood, and
 import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List
-import math
+import functools
+import time
+from app.viewmodels.ml._rng import rng
+
+# Day/night cycles only take 24 distinct values, so precompute them per hour of day
+_SEASONAL24 = 2.0 * np.sin((np.arange(24) - 6) * np.pi / 12)
+_TEMP_DIURNAL24 = 6.0 * np.sin((np.arange(24) - 8) * np.pi / 12)
+
+# Exponential smoothing over the last 5 points, unrolled into fixed weights
+_SMOOTH_ALPHA = 0.3
+_SMOOTH_W = np.array([_SMOOTH_ALPHA * (1 - _SMOOTH_ALPHA) ** (4 - k) for k in range(5)])
+
+# Simulated history is reused for identical polls within the same 5-minute window
+HISTORY_BUCKET_SECONDS = 300
+
+def _history_bucket() -> int:
+    """Index of the current 5-minute window, used as part of the history cache key"""
+    return int(time.time() // HISTORY_BUCKET_SECONDS)
+
+@functools.lru_cache(maxsize=64)
+def _hist_temp(city: str, bucket: int, base_hour: int) -> tuple:
+    """Diurnal temperature baseline for the 24 hours before base_hour (noise added by caller)"""
+    hours = (base_hour - 24 + np.arange(24)) % 24
+    base_temp = 28.0
+    return tuple((base_temp + _TEMP_DIURNAL24[hours]).tolist())
+
+@functools.lru_cache(maxsize=64)
+def _hist_rainfall(city: str, bucket: int) -> tuple:
+    """Simulated rainfall for the last 72 hours"""
+    return tuple(np.maximum(0, 0.5 + rng.exponential(2.0, size=72)).tolist())
+
+@functools.lru_cache(maxsize=64)
+def _hist_demand(city: str, bucket: int, base_hour: int) -> tuple:
+    """Hourly demand baseline for the 24 hours before base_hour (noise added by caller)"""
+    baseline = []
+    for i in range(24):
+        hour = (base_hour - 24 + i) % 24
+        # Peak hours have higher demand
+        base_demand = 4500  # MW
+        if 8 <= hour <= 10 or 17 <= hour <= 20:
+            baseline.append(base_demand * 1.3)
+        else:
+            baseline.append(base_demand * 0.8)
+    return tuple(baseline)
 
 class SimpleLSTM:
     """
@@ -31,13 +74,13 @@ class SimpleLSTM:
         recent = historical_data[-self.sequence_length:]
         trend = (recent[-1] - recent[0]) / len(recent) if len(recent) > 1 else 0
         
-        # Exponential smoothing
-        alpha = 0.3
-        smoothed = historical_data[-1]
-        for val in historical_data[-5:]:
-            smoothed = alpha * val + (1 - alpha) * smoothed
+        # Exponential smoothing (seeded with the last value)
+        tail = np.asarray(historical_data[-5:], dtype=float)
+        smoothed = float(np.dot(_SMOOTH_W[-len(tail):], tail)
+                         + (1 - _SMOOTH_ALPHA) ** len(tail) * historical_data[-1])
         
         # Generate predictions
+        now = datetime.now().replace(microsecond=0)
         predictions = []
         for i in range(forecast_hours):
             # Apply trend with decay
@@ -45,9 +88,8 @@ class SimpleLSTM:
             predicted = smoothed + trend_factor * (i + 1)
             
             # Add some seasonality (day/night cycle)
-            hour_of_day = (datetime.now().hour + i) % 24
-            seasonal_adjustment = 2 * math.sin((hour_of_day - 6) * math.pi / 12)
-            predicted += seasonal_adjustment
+            hour_of_day = (now.hour + i) % 24
+            predicted += float(_SEASONAL24[hour_of_day])
             
             # Confidence decreases over time
             confidence = max(0.3, 1.0 - (i / forecast_hours) * 0.5)
@@ -56,7 +98,7 @@ class SimpleLSTM:
                 "hour": i,
                 "value": round(predicted, 2),
                 "confidence": round(confidence, 2),
-                "timestamp": (datetime.now() + timedelta(hours=i)).isoformat()
+                "timestamp": (now + timedelta(hours=i)).isoformat()
             })
         
         return predictions
@@ -66,22 +108,18 @@ def forecast_temperature(city: str = "Mumbai", hours_ahead: int = 48) -> Dict:
     ML-based temperature forecasting
     """
     # Simulate historical data (in real app, fetch from database)
-    current_hour = datetime.now().hour
-    historical = []
-    for i in range(24):
-        hour = (current_hour - 24 + i) % 24
-        base_temp = 28.0
-        temp_variation = 6.0 * math.sin((hour - 8) * math.pi / 12)
-        historical.append(base_temp + temp_variation + np.random.normal(0, 1))
+    baseline = _hist_temp(city, _history_bucket(), datetime.now().hour)
+    historical = (np.asarray(baseline) + rng.normal(0, 1, size=len(baseline))).tolist()
     
     model = SimpleLSTM(sequence_length=24)
     predictions = model.predict(historical, forecast_hours=hours_ahead)
     
     # Calculate statistics
-    values = [p["value"] for p in predictions]
-    avg_predicted = np.mean(values)
-    max_predicted = max(values)
-    min_predicted = min(values)
+    values = np.asarray([p["value"] for p in predictions])
+    peak_idx = int(np.argmax(values))
+    avg_predicted = float(np.mean(values))
+    max_predicted = float(values[peak_idx])
+    min_predicted = float(np.min(values))
     
     # Risk assessment
     risk_level = "Low"
@@ -107,7 +145,7 @@ def forecast_temperature(city: str = "Mumbai", hours_ahead: int = 48) -> Dict:
         "risk_assessment": {
             "level": risk_level,
             "peak_temp": round(max_predicted, 2),
-            "peak_hour": predictions[values.index(max_predicted)]["timestamp"]
+            "peak_hour": predictions[peak_idx]["timestamp"]
         },
         "model_info": {
             "type": "LSTM-based Time Series",
@@ -122,11 +160,7 @@ def forecast_flood_risk(city: str = "Mumbai", hours_ahead: int = 72) -> Dict:
     ML-based flood risk forecasting
     """
     # Simulate historical rainfall data
-    historical_rainfall = []
-    for i in range(72):
-        # Simulate rainfall pattern
-        base = 0.5 + np.random.exponential(2.0)
-        historical_rainfall.append(max(0, base))
+    historical_rainfall = list(_hist_rainfall(city, _history_bucket()))
     
     model = SimpleLSTM(sequence_length=24)
     predictions = model.predict(historical_rainfall, forecast_hours=hours_ahead)
@@ -171,24 +205,17 @@ def forecast_energy_demand(city: str = "Mumbai", hours_ahead: int = 24) -> Dict:
     ML-based energy demand forecasting
     """
     # Simulate historical demand
-    historical_demand = []
-    for i in range(24):
-        hour = (datetime.now().hour - 24 + i) % 24
-        # Peak hours have higher demand
-        base_demand = 4500  # MW
-        if 8 <= hour <= 10 or 17 <= hour <= 20:
-            demand = base_demand * 1.3
-        else:
-            demand = base_demand * 0.8
-        historical_demand.append(demand + np.random.normal(0, 100))
+    baseline = _hist_demand(city, _history_bucket(), datetime.now().hour)
+    historical_demand = (np.asarray(baseline) + rng.normal(0, 100, size=len(baseline))).tolist()
     
     model = SimpleLSTM(sequence_length=24)
     predictions = model.predict(historical_demand, forecast_hours=hours_ahead)
     
     # Calculate peak demand
-    values = [p["value"] for p in predictions]
-    peak_demand = max(values)
-    peak_hour = predictions[values.index(peak_demand)]["hour"]
+    values = np.asarray([p["value"] for p in predictions])
+    peak_idx = int(np.argmax(values))
+    peak_demand = float(values[peak_idx])
+    peak_hour = predictions[peak_idx]["hour"]
     
     return {
         "city": city,
@@ -196,10 +223,10 @@ def forecast_energy_demand(city: str = "Mumbai", hours_ahead: int = 24) -> Dict:
         "forecast_hours": hours_ahead,
         "predictions": predictions,
         "statistics": {
-            "average_demand": round(np.mean(values), 2),
+            "average_demand": round(float(np.mean(values)), 2),
             "peak_demand": round(peak_demand, 2),
             "peak_hour": peak_hour,
-            "minimum_demand": round(min(values), 2)
+            "minimum_demand": round(float(np.min(values)), 2)
         },
         "recommendations": {
             "peak_preparation": f"Prepare for peak demand at hour {peak_hour}",
@@ -2,8 +2,12 @@ import random
 import math
 
 from app.viewmodels.ingestion.openweather import fetch_weather_by_coords
+from app.viewmodels.ml._ttl_cache import ttl_cache, no_error
 import os
 
+# Hotspot base temperature only needs weather at minute granularity; failed lookups are not kept
+_weather_by_coords = ttl_cache(ttl=600, maxsize=64, should_cache=no_error)(fetch_weather_by_coords)
+
 def detect_hotspots(city: str = "Mumbai", lat: float = 19.0760, lon: float = 72.8777):
     # Fetch real weather if possible to set base temp
     api_key = os.getenv("OPENWEATHER_API_KEY")
@@ -11,7 +15,7 @@ def detect_hotspots(city: str = "Mumbai", lat: float = 19.0760, lon: float = 72.
     
     if api_key:
         # Try to get weather for the coordinates
-        weather = fetch_weather_by_coords(lat, lon, api_key)
+        weather = _weather_by_coords(lat, lon, api_key)
         if weather and "main" in weather:
             base_temp = weather["main"]["temp"] - 273.15
             
@@ -3,10 +3,30 @@ Hazard Intensity Timeline + Future Projection
 Shows next 6/12/24 hours with confidence intervals and worst-case scenarios
 """
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Dict, List
 from app.viewmodels.ml.forecasting import forecast_temperature, forecast_flood_risk, forecast_energy_demand
+from app.viewmodels.ml._rng import rng
+from app.viewmodels.ml._ttl_cache import ttl_cache
 
+# Base tide level (m) for each hour of day; only 24 distinct values
+_TIDE_LUT = 1.0 + 1.5 * np.sin(np.arange(24) * np.pi / 6)
+
+def _forecast_columns(predictions: List[Dict], hours_ahead: int):
+    """Value and confidence arrays for the first hours_ahead forecast points"""
+    preds = predictions[:hours_ahead]
+    values = np.fromiter((p["value"] for p in preds), dtype=np.float64, count=len(preds))
+    confidence = np.fromiter((p["confidence"] for p in preds), dtype=np.float64, count=len(preds))
+    return values, confidence
+
+def _rounded(column: np.ndarray, decimals: int) -> np.ndarray:
+    """
+    Round with Python's round() per value; only for columns where np.round, which
+    scales by 10**decimals first, lands on the other side of ties like 0.995 or 34.85
+    """
+    return np.array([round(value, decimals) for value in column.tolist()])
+
+@ttl_cache(ttl=30, key=lambda city="Mumbai", hours_ahead=24: (city, hours_ahead))
 def generate_hazard_timeline(city: str = "Mumbai", hours_ahead: int = 24) -> Dict:
     """
     Generate comprehensive hazard timeline with projections
@@ -17,136 +37,195 @@ def generate_hazard_timeline(city: str = "Mumbai", hours_ahead: int = 24) -> Dic
     flood_forecast = forecast_flood_risk(city, hours_ahead=min(hours_ahead, 72))
     energy_forecast = forecast_energy_demand(city, hours_ahead=min(hours_ahead, 24))
     
-    # Generate timeline points
-    timeline = []
+    # Build per-hour columns as float64 arrays (float32 shifts values that sit on rounding
+    # ties, e.g. 0.995 or 34.85), then package them into the timeline
     now = datetime.now()
+    hours = np.arange(hours_ahead)
+    progress = hours / hours_ahead
+    hour_of_day = (now.hour + hours) % 24
+    timestamps = np.datetime_as_string(
+        np.datetime64(now, "s") + hours * np.timedelta64(3600, "s"), unit="s"
+    )
+    
+    # Temperature/Heatwave data (extrapolate past the end of the forecast)
+    temp_values, temp_confidence = _forecast_columns(temp_forecast["predictions"], hours_ahead)
+    n_temp = len(temp_values)
+    temp_arr = np.empty(hours_ahead)
+    temp_conf = np.empty(hours_ahead)
+    temp_arr[:n_temp] = temp_values
+    temp_conf[:n_temp] = temp_confidence
+    if n_temp < hours_ahead:
+        last_temp = temp_values[-1] if n_temp else 30.0
+        temp_arr[n_temp:] = last_temp + 0.5 * rng.standard_normal(hours_ahead - n_temp)
+        temp_conf[n_temp:] = np.clip(1.0 - progress[n_temp:] * 0.5, 0.3, None)
+    
+    # Heatwave probability (based on temperature); the bands are masks
+    # multiplied in, so the whole curve is straight-line array arithmetic
+    warm_band = (temp_arr > 35) & (temp_arr <= 38)
+    hot_band = temp_arr > 38
+    # (fmax keeps the masked-out terms non-negative so they zero out as +0.0)
+    heatwave_prob = warm_band * (0.1 + np.fmax(temp_arr - 35, 0) * 0.1)
+    heatwave_prob += hot_band * np.fmin(0.3 + np.fmax(temp_arr - 38, 0) * 0.15, 1.0)
+    
+    # Worst-case temperature (upper bound), built in place to avoid temporaries
+    worst_case_temp = 1.0 - temp_conf
+    worst_case_temp *= 3.0
+    worst_case_temp += temp_arr
+    
+    # Flood surge level
+    flood_values, flood_confidence = _forecast_columns(flood_forecast["predictions"], hours_ahead)
+    n_flood = len(flood_values)
+    rainfall_arr = np.full(hours_ahead, 0.5)
+    flood_conf = np.full(hours_ahead, 0.3)
+    rainfall_arr[:n_flood] = flood_values
+    flood_conf[:n_flood] = flood_confidence
     
-    for i in range(hours_ahead):
-        timestamp = now + timedelta(hours=i)
-        hour_of_day = timestamp.hour
-        
-        # Temperature/Heatwave data
-        if i < len(temp_forecast["predictions"]):
-            temp_pred = temp_forecast["predictions"][i]
-            temp_value = temp_pred["value"]
-            temp_confidence = temp_pred["confidence"]
-        else:
-            # Extrapolate
-            last_temp = temp_forecast["predictions"][-1]["value"] if temp_forecast["predictions"] else 30.0
-            temp_value = last_temp + np.random.normal(0, 0.5)
-            temp_confidence = max(0.3, 1.0 - (i / hours_ahead) * 0.5)
-        
-        # Heatwave probability (based on temperature)
-        heatwave_prob = 0.0
-        if temp_value > 38:
-            heatwave_prob = min(1.0, 0.3 + (temp_value - 38) * 0.15)
-        elif temp_value > 35:
-            heatwave_prob = 0.1 + (temp_value - 35) * 0.1
-        
-        # Worst-case temperature (upper bound)
-        worst_case_temp = temp_value + (1 - temp_confidence) * 3.0
-        
-        # Flood surge level
-        if i < len(flood_forecast["predictions"]):
-            flood_pred = flood_forecast["predictions"][i]
-            rainfall = flood_pred["value"]
-            flood_confidence = flood_pred["confidence"]
-        else:
-            rainfall = 0.5
-            flood_confidence = 0.3
-        
-        # Surge level calculation (meters)
-        base_tide = 1.0 + 1.5 * np.sin(hour_of_day * np.pi / 6)
-        surge_level = base_tide + (rainfall / 50.0) * 0.5  # Rainfall contributes to surge
-        worst_case_surge = surge_level + (1 - flood_confidence) * 0.8
-        
-        # AQI trend (simulated based on time of day and weather)
-        base_aqi = 80
-        if 8 <= hour_of_day <= 10 or 17 <= hour_of_day <= 20:
-            base_aqi += 40  # Traffic hours
-        if temp_value > 35:
-            base_aqi += (temp_value - 35) * 2  # Heat increases pollution
-        
-        aqi_value = base_aqi + np.random.normal(0, 10)
-        aqi_confidence = max(0.5, 1.0 - (i / hours_ahead) * 0.3)
-        worst_case_aqi = aqi_value + (1 - aqi_confidence) * 30
-        
-        # Energy load
-        if i < len(energy_forecast["predictions"]):
-            energy_pred = energy_forecast["predictions"][i]
-            energy_value = energy_pred["value"]
-            energy_confidence = energy_pred["confidence"]
-        else:
-            energy_value = 4500
-            energy_confidence = 0.5
-        
-        worst_case_energy = energy_value + (1 - energy_confidence) * 500
-        
-        timeline.append({
-            "timestamp": timestamp.isoformat(),
-            "hour_offset": i,
-            "hour_of_day": hour_of_day,
+    # Surge level calculation (meters)
+    base_tide = _TIDE_LUT[hour_of_day]
+    surge_arr = rainfall_arr / 50.0  # Rainfall contributes to surge
+    surge_arr *= 0.5
+    surge_arr += base_tide
+    worst_case_surge = 1.0 - flood_conf
+    worst_case_surge *= 0.8
+    worst_case_surge += surge_arr
+    
+    # AQI trend (simulated based on time of day and weather)
+    traffic_hours = ((hour_of_day >= 8) & (hour_of_day <= 10)) | ((hour_of_day >= 17) & (hour_of_day <= 20))
+    aqi_arr = rng.standard_normal(hours_ahead)
+    aqi_arr *= 10
+    aqi_arr += 80
+    aqi_arr[traffic_hours] += 40  # Traffic hours
+    hot = temp_arr > 35
+    aqi_arr[hot] += (temp_arr[hot] - 35) * 2  # Heat increases pollution
+    
+    aqi_conf = np.clip(1.0 - progress * 0.3, 0.5, None)
+    worst_case_aqi = 1.0 - aqi_conf
+    worst_case_aqi *= 30
+    worst_case_aqi += aqi_arr
+    
+    # Energy load
+    energy_values, energy_confidence = _forecast_columns(energy_forecast["predictions"], hours_ahead)
+    n_energy = len(energy_values)
+    energy_arr = np.full(hours_ahead, 4500.0)
+    energy_conf = np.full(hours_ahead, 0.5)
+    energy_arr[:n_energy] = energy_values
+    energy_conf[:n_energy] = energy_confidence
+    
+    worst_case_energy = 1.0 - energy_conf
+    worst_case_energy *= 500
+    worst_case_energy += energy_arr
+    
+    # Round every output column once; surge and AQI keep their raw values for classification.
+    # np.round matches round() for the numpy-computed columns (surge, AQI, extrapolated
+    # temperatures), whole-number rounding, and forecast confidences already at 2 decimals.
+    # Only the forecast temperatures, rainfall and the derived confidence curves sit on
+    # ties where np.round differs, so those go through _rounded
+    temp_out = np.round(temp_arr, 1)
+    worst_case_temp_out = np.round(worst_case_temp, 1)
+    heatwave_out = np.round(heatwave_prob, 2)
+    temp_out[:n_temp] = _rounded(temp_arr[:n_temp], 1)
+    worst_case_temp_out[:n_temp] = _rounded(worst_case_temp[:n_temp], 1)
+    heatwave_out[:n_temp] = _rounded(heatwave_prob[:n_temp], 2)
+    temp_arr, worst_case_temp, heatwave_prob = temp_out, worst_case_temp_out, heatwave_out
+    temp_conf = _rounded(temp_conf, 2)
+    surge_out = np.round(surge_arr, 2)
+    worst_case_surge = np.round(worst_case_surge, 2)
+    rainfall_arr = _rounded(rainfall_arr, 1)
+    flood_conf = np.round(flood_conf, 2)
+    aqi_out = np.round(aqi_arr, 0)
+    worst_case_aqi = np.round(worst_case_aqi, 0)
+    aqi_conf = _rounded(aqi_conf, 2)
+    energy_arr = np.round(energy_arr, 0)
+    worst_case_energy = np.round(worst_case_energy, 0)
+    energy_conf = np.round(energy_conf, 2)
+    
+    # Classify every hour at once from the raw values
+    risk_levels = np.select([surge_arr > 2.2, surge_arr > 1.8], ["High", "Medium"], default="Low")
+    aqi_categories = np.select(
+        [aqi_arr < 50, aqi_arr < 100, aqi_arr < 150],
+        ["Good", "Moderate", "Unhealthy"],
+        default="Very Unhealthy"
+    )
+    
+    # Generate timeline points in one pass; tolist() yields plain Python values for the response
+    columns = zip(
+        timestamps.tolist(), hours.tolist(), hour_of_day.tolist(),
+        temp_arr.tolist(), worst_case_temp.tolist(), temp_conf.tolist(), heatwave_prob.tolist(),
+        surge_out.tolist(), worst_case_surge.tolist(), rainfall_arr.tolist(), flood_conf.tolist(), risk_levels.tolist(),
+        aqi_out.tolist(), worst_case_aqi.tolist(), aqi_conf.tolist(), aqi_categories.tolist(),
+        energy_arr.tolist(), worst_case_energy.tolist(), energy_conf.tolist()
+    )
+    timeline = [
+        {
+            "timestamp": ts,
+            "hour_offset": offset,
+            "hour_of_day": hod,
             "temperature": {
-                "predicted": round(temp_value, 1),
-                "worst_case": round(worst_case_temp, 1),
-                "confidence": round(temp_confidence, 2),
-                "heatwave_probability": round(heatwave_prob, 2)
+                "predicted": tp,
+                "worst_case": tw,
+                "confidence": tc,
+                "heatwave_probability": hw
             },
             "flood": {
-                "surge_level_m": round(surge_level, 2),
-                "worst_case_m": round(worst_case_surge, 2),
-                "rainfall_mm": round(rainfall, 1),
-                "confidence": round(flood_confidence, 2),
-                "risk_level": "High" if surge_level > 2.2 else "Medium" if surge_level > 1.8 else "Low"
+                "surge_level_m": sl,
+                "worst_case_m": sw,
+                "rainfall_mm": rf,
+                "confidence": fc,
+                "risk_level": rl
             },
             "aqi": {
-                "predicted": round(aqi_value, 0),
-                "worst_case": round(worst_case_aqi, 0),
-                "confidence": round(aqi_confidence, 2),
-                "category": "Good" if aqi_value < 50 else "Moderate" if aqi_value < 100 else "Unhealthy" if aqi_value < 150 else "Very Unhealthy"
+                "predicted": ap,
+                "worst_case": aw,
+                "confidence": ac,
+                "category": cat
             },
             "energy": {
-                "demand_mw": round(energy_value, 0),
-                "worst_case_mw": round(worst_case_energy, 0),
-                "confidence": round(energy_confidence, 2)
+                "demand_mw": ed,
+                "worst_case_mw": ew,
+                "confidence": ec
             }
-        })
+        }
+        for ts, offset, hod, tp, tw, tc, hw, sl, sw, rf, fc, rl, ap, aw, ac, cat, ed, ew, ec in columns
+    ]
     
     # Calculate critical periods
     critical_periods = []
     
-    # Heatwave critical periods (next 6 hours)
-    next_6h = [t for t in timeline if t["hour_offset"] <= 6]
-    high_heat_periods = [t for t in next_6h if t["temperature"]["heatwave_probability"] > 0.5]
-    if high_heat_periods:
+    # Heatwave critical periods (next 6 hours, offsets 0-6)
+    next_6h_heat = heatwave_prob[:7]
+    high_heat = next_6h_heat > 0.5
+    high_heat_count = int(high_heat.sum())
+    if high_heat_count:
         critical_periods.append({
             "type": "heatwave",
             "severity": "High",
-            "period": f"Next {len(high_heat_periods)} hours",
-            "probability": round(max([t["temperature"]["heatwave_probability"] for t in high_heat_periods]), 2),
+            "period": f"Next {high_heat_count} hours",
+            "probability": float(next_6h_heat[high_heat].max()),
             "recommendation": "Activate cooling systems immediately"
         })
     
-    # Flood surge critical periods (next 12 hours)
-    next_12h = [t for t in timeline if t["hour_offset"] <= 12]
-    high_flood_periods = [t for t in next_12h if t["flood"]["risk_level"] == "High"]
-    if high_flood_periods:
+    # Flood surge critical periods (next 12 hours, offsets 0-12)
+    next_12h_surge = surge_arr[:13]
+    high_flood = next_12h_surge > 2.2
+    high_flood_count = int(high_flood.sum())
+    if high_flood_count:
         critical_periods.append({
             "type": "flood_surge",
             "severity": "High",
-            "period": f"Next {len(high_flood_periods)} hours",
-            "peak_surge": round(max([t["flood"]["surge_level_m"] for t in high_flood_periods]), 2),
+            "period": f"Next {high_flood_count} hours",
+            "peak_surge": float(surge_out[:13][high_flood].max()),
             "recommendation": "Prepare coastal barriers"
         })
     
     # AQI critical periods (next 24 hours)
-    high_aqi_periods = [t for t in timeline if t["aqi"]["predicted"] > 150]
-    if high_aqi_periods:
+    high_aqi = aqi_out > 150
+    high_aqi_count = int(high_aqi.sum())
+    if high_aqi_count:
         critical_periods.append({
             "type": "air_quality",
             "severity": "Medium",
-            "period": f"Next {len(high_aqi_periods)} hours",
-            "peak_aqi": round(max([t["aqi"]["predicted"] for t in high_aqi_periods]), 0),
+            "period": f"Next {high_aqi_count} hours",
+            "peak_aqi": float(aqi_out[high_aqi].max()),
             "recommendation": "Activate air purification systems"
         })
     
@@ -157,9 +236,9 @@ def generate_hazard_timeline(city: str = "Mumbai", hours_ahead: int = 24) -> Dic
         "timeline": timeline,
         "critical_periods": critical_periods,
         "summary": {
-            "next_6h_heatwave_prob": round(max([t["temperature"]["heatwave_probability"] for t in timeline[:6]]), 2) if timeline else 0.0,
-            "next_12h_max_surge": round(max([t["flood"]["surge_level_m"] for t in timeline[:12]]), 2) if timeline else 0.0,
-            "next_24h_max_aqi": round(max([t["aqi"]["predicted"] for t in timeline[:24]]), 0) if timeline else 0,
+            "next_6h_heatwave_prob": float(heatwave_prob[:6].max()) if hours_ahead > 0 else 0.0,
+            "next_12h_max_surge": float(surge_out[:12].max()) if hours_ahead > 0 else 0.0,
+            "next_24h_max_aqi": float(aqi_out[:24].max()) if hours_ahead > 0 else 0,
             "critical_periods_count": len(critical_periods)
         },
         "model_info": {
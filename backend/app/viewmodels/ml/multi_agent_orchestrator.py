@@ -2,11 +2,16 @@
 Multi-Agent Orchestrator
 Coordinates Heat, Flood, AQI, and Energy agents with conflict resolution
 """
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Dict, List, Optional
 from app.viewmodels.ml.command_hub import get_command_hub_status
 from app.viewmodels.ml.forecasting import forecast_temperature, forecast_flood_risk
 from app.viewmodels.ml.anomaly_detection import detect_temperature_anomalies, detect_rainfall_anomalies
+from app.viewmodels.ml._ttl_cache import ttl_cache
+
+# Sort rank for action priorities (CRITICAL first)
+_PRIO_INT = {"CRITICAL": 0, "HIGH": 1, "MEDIUM": 2, "LOW": 3}
 
 class Agent:
     """Base agent class"""
@@ -207,32 +212,40 @@ class CoordinatorBrain:
     Central coordinator that resolves conflicts between agents
     """
     def __init__(self):
-        self.agents = [
+        # Priorities are fixed, so sort once here rather than on every orchestrate call
+        self.agents = sorted([
             HeatAgent(),
             FloodAgent(),
             AQIAgent(),
             EnergyAgent()
-        ]
-        self.policy_engine = None  # Will be set by PolicyEngine
+        ], key=lambda x: x.priority)
     
     def orchestrate(self, city: str = "Mumbai", policy_engine=None) -> Dict:
         """
         Orchestrate all agents and resolve conflicts
+        Shared across requests, so per-request state stays local to this call
         """
-        self.policy_engine = policy_engine
-        
-        # Get current context
-        hub_status = get_command_hub_status(city)
-        temp_forecast = forecast_temperature(city, hours_ahead=24)
-        flood_forecast = forecast_flood_risk(city, hours_ahead=48)
-        temp_anomalies = detect_temperature_anomalies(city)
-        rainfall_anomalies = detect_rainfall_anomalies(city)
+        # Get current context (independent calls, fetched concurrently). The pool is per call
+        # so concurrent orchestrations never queue their fetches behind each other
+        with ThreadPoolExecutor(max_workers=5, thread_name_prefix="orchestrator") as executor:
+            hub_future = executor.submit(get_command_hub_status, city)
+            temp_future = executor.submit(forecast_temperature, city, hours_ahead=24)
+            flood_future = executor.submit(forecast_flood_risk, city, hours_ahead=48)
+            temp_anomalies_future = executor.submit(detect_temperature_anomalies, city)
+            rainfall_anomalies_future = executor.submit(detect_rainfall_anomalies, city)
+            
+            hub_status = hub_future.result()
+            temp_forecast = temp_future.result()
+            flood_forecast = flood_future.result()
+            temp_anomalies = temp_anomalies_future.result()
+            rainfall_anomalies = rainfall_anomalies_future.result()
         
+        subsystems = hub_status["subsystems"]
         context = {
-            "temperature": hub_status["subsystems"]["uhi"]["average_temp"],
-            "flood_risk": hub_status["subsystems"]["flood"]["risk"],
-            "aqi": hub_status["subsystems"]["air_quality"]["aqi"],
-            "energy_load": hub_status["subsystems"]["energy"]["forecast"]["peak_demand"],
+            "temperature": subsystems["uhi"]["average_temp"],
+            "flood_risk": subsystems["flood"]["risk"],
+            "aqi": subsystems["air_quality"]["aqi"],
+            "energy_load": subsystems["energy"]["forecast"]["peak_demand"],
             "temp_forecast": temp_forecast,
             "flood_forecast": flood_forecast,
             "temp_anomalies": temp_anomalies,
@@ -240,13 +253,14 @@ class CoordinatorBrain:
         }
         
         # Get recommendations from all agents
-        agent_analyses = []
+        analyses_by_name = {}
         all_actions = []
         
-        for agent in sorted(self.agents, key=lambda x: x.priority):
+        for agent in self.agents:
             analysis = agent.analyze(context)
-            agent_analyses.append(analysis)
-            all_actions.extend(analysis.get("recommended_actions", []))
+            analyses_by_name[analysis["agent"]] = analysis
+            # Hand the resolver its own copies; it modifies actions in place
+            all_actions.extend(map(dict, analysis.get("recommended_actions", [])))
         
         # Resolve conflicts using policy engine
         if policy_engine:
@@ -254,8 +268,14 @@ class CoordinatorBrain:
         else:
             resolved_actions = self._simple_resolve(all_actions, context)
         
-        # Calculate total energy impact
-        total_energy_impact = sum(a.get("energy_impact_mw", 0) for a in resolved_actions)
+        # Calculate total energy impact and priority counts in one pass
+        total_energy_impact = 0
+        critical_actions = high_priority_actions = 0
+        for a in resolved_actions:
+            total_energy_impact += a.get("energy_impact_mw", 0)
+            priority = a.get("priority")
+            critical_actions += priority == "CRITICAL"
+            high_priority_actions += priority == "HIGH"
         
         return {
             "city": city,
@@ -266,7 +286,7 @@ class CoordinatorBrain:
                     "name": a.name,
                     "priority": a.priority,
                     "status": a.status,
-                    "analysis": next((ag for ag in agent_analyses if ag["agent"] == a.name), {})
+                    "analysis": analyses_by_name.get(a.name, {})
                 }
                 for a in self.agents
             ],
@@ -276,32 +296,34 @@ class CoordinatorBrain:
             "coordination_summary": {
                 "active_agents": len([a for a in self.agents if a.status == "active"]),
                 "total_recommendations": len(resolved_actions),
-                "critical_actions": sum(1 for a in resolved_actions if a.get("priority") == "CRITICAL"),
-                "high_priority_actions": sum(1 for a in resolved_actions if a.get("priority") == "HIGH")
+                "critical_actions": critical_actions,
+                "high_priority_actions": high_priority_actions
             }
         }
     
     def _simple_resolve(self, actions: List[Dict], context: Dict) -> List[Dict]:
         """Simple conflict resolution (prioritize by agent priority)"""
         # Sort by priority (CRITICAL > HIGH > MEDIUM)
-        priority_order = {"CRITICAL": 0, "HIGH": 1, "MEDIUM": 2, "LOW": 3}
-        actions.sort(key=lambda x: priority_order.get(x.get("priority", "LOW"), 3))
+        actions.sort(key=lambda x: _PRIO_INT.get(x.get("priority", "LOW"), 3))
         
         # Simple deduplication
         seen_actions = set()
         resolved = []
         for action in actions:
-            action_key = f"{action.get('action')}_{action.get('zones')}"
+            action_key = (action.get("action"), action.get("zones"))
             if action_key not in seen_actions:
                 seen_actions.add(action_key)
                 resolved.append(action)
         
         return resolved
 
+# Agents hold no per-request state, so one coordinator serves every request
+_COORDINATOR = CoordinatorBrain()
+
+@ttl_cache(ttl=30, key=lambda city="Mumbai", policy_engine=None: (city, id(policy_engine)))
 def get_multi_agent_orchestration(city: str = "Mumbai", policy_engine=None) -> Dict:
     """
     Get multi-agent orchestration results
     """
-    coordinator = CoordinatorBrain()
-    return coordinator.orchestrate(city, policy_engine)
+    return _COORDINATOR.orchestrate(city, policy_engine)
 
@@ -2,79 +2,167 @@
 Policy Engine + Safety Checks
 Prevents conflicting actions and enforces safety rules
 """
+import sys
+import numpy as np
 from typing import Dict, List, Optional
 from datetime import datetime
+from functools import lru_cache
+from operator import itemgetter
+
+# Canonical action/priority names, interned so names interned at ingest compare by identity
+RAISE_COASTAL_BARRIERS = sys.intern("RAISE_COASTAL_BARRIERS")
+LOWER_COASTAL_BARRIERS = sys.intern("LOWER_COASTAL_BARRIERS")
+ACTIVATE_COOLING = sys.intern("ACTIVATE_COOLING")
+DEACTIVATE_COOLING = sys.intern("DEACTIVATE_COOLING")
+CRITICAL = sys.intern("CRITICAL")
+HIGH = sys.intern("HIGH")
+MEDIUM = sys.intern("MEDIUM")
+LOW = sys.intern("LOW")
+
+# Sort rank for action priorities (CRITICAL first), stamped on actions as "_prio"
+_PRIO = {CRITICAL: 0, HIGH: 1, MEDIUM: 2, LOW: 3}
+_by_prio = itemgetter("_prio")
+
+# Locals available to policy conditions inside the compiled check
+_POLICY_PRELUDE = """\
+def check(context, action):
+    name = action.get("action", "")
+    priority = action.get("priority")
+    load = context.get("energy_load", 0) / 6000
+    aqi = context.get("aqi", 0)
+    hits = []
+"""
+
+def _pending_action_names(context: Dict) -> frozenset:
+    """Names of pending actions, using the set precomputed by resolve_conflicts when present"""
+    names = context.get("_pending_action_set")
+    if names is None:
+        names = frozenset(a.get("action", "") for a in context.get("pending_actions", []))
+    return names
+
+def _intern_names(action: Dict):
+    """Intern an incoming action's name and priority so later comparisons hit the identity fast path"""
+    for field in ("action", "priority"):
+        value = action.get(field)
+        if type(value) is str:
+            action[field] = sys.intern(value)
 
 class PolicyEngine:
     """
     Policy engine that enforces safety rules and prevents conflicts
     """
     
+    # Policies are static, so compiled checks (one per candidate rule set) are shared by all instances
+    _compiled_checks = {}
+    
     def __init__(self):
         self.policies = self._initialize_policies()
         self.safety_checks = self._initialize_safety_checks()
         self.conflict_rules = self._initialize_conflict_rules()
+        # Mutually exclusive action pairs
+        self._conflict_pairs = (
+            (RAISE_COASTAL_BARRIERS, LOWER_COASTAL_BARRIERS),
+            (ACTIVATE_COOLING, DEACTIVATE_COOLING),
+        )
+        # action name -> the name it conflicts with
+        self._opponent = {}
+        for first, second in self._conflict_pairs:
+            self._opponent[first] = second
+            self._opponent[second] = first
+        # "applies_to" key -> policy indices: exact names, "*SUBSTRING*" patterns and "*" for all
+        self._rule_index = {}
+        for idx, policy in enumerate(self.policies):
+            self._rule_index.setdefault(policy["applies_to"], []).append(idx)
+        self._substring_keys = tuple(k for k in self._rule_index if len(k) > 2 and k[0] == k[-1] == "*")
+    
+    def _check_for(self, action_name: str):
+        """Compiled check covering only the policies that can apply to this action name"""
+        index = self._rule_index
+        candidates = index.get(action_name, []) + index.get("*", [])
+        for key in self._substring_keys:
+            if key[1:-1] in action_name:
+                candidates += index[key]
+        candidates = tuple(sorted(candidates))
+        
+        check = PolicyEngine._compiled_checks.get(candidates)
+        if check is None:
+            check = PolicyEngine._compiled_checks[candidates] = self._compile_policies(self.policies, candidates)
+        return check
+    
+    @staticmethod
+    def _compile_policies(policies: List[Dict], indices):
+        """
+        Fuse the given policies' conditions into one generated function.
+        check(context, action) returns the indices of the policies whose condition holds.
+        """
+        src = _POLICY_PRELUDE
+        for idx in indices:
+            src += f"    if {policies[idx]['condition']}:\n        hits.append({idx})\n"
+        src += "    return hits\n"
+        namespace = {"pending_action_names": _pending_action_names}
+        exec(compile(src, "<policies>", "exec"), namespace)
+        return namespace["check"]
     
     def _initialize_policies(self) -> List[Dict]:
-        """Initialize system policies"""
+        """
+        Initialize system policies
+        Conditions are Python expressions over the locals defined in _POLICY_PRELUDE
+        (plus pending_action_names(context)); "applies_to" must cover every name the
+        condition can match: an exact action name, "*SUBSTRING*", or "*" for any action
+        Conditions must depend only on the action's name/priority and the context
+        (resolve_conflicts shares their hits between actions with the same name and priority)
+        """
         return [
             {
                 "id": "energy_threshold",
                 "rule": "Don't raise coastal shields while energy load is below 80% capacity",
-                "condition": lambda context, action: (
-                    action.get("action") == "RAISE_COASTAL_BARRIERS" and
-                    context.get("energy_load", 0) / 6000 < 0.8
-                ),
+                "applies_to": RAISE_COASTAL_BARRIERS,
+                "condition": "name == 'RAISE_COASTAL_BARRIERS' and load < 0.8",
                 "action": "BLOCK",
                 "reason": "Energy capacity sufficient, barriers not needed"
             },
             {
                 "id": "cooling_during_peak",
                 "rule": "Don't trigger cooling nodes during peak energy load (>90%)",
-                "condition": lambda context, action: (
-                    "COOLING" in action.get("action", "") and
-                    context.get("energy_load", 0) / 6000 > 0.9
-                ),
+                "applies_to": "*COOLING*",
+                "condition": "'COOLING' in name and load > 0.9",
                 "action": "DEFER",
                 "reason": "Peak energy load - defer cooling to avoid grid overload"
             },
             {
                 "id": "conflicting_barriers",
                 "rule": "Don't raise and lower barriers simultaneously",
-                "condition": lambda context, action: (
-                    action.get("action") == "LOWER_COASTAL_BARRIERS" and
-                    any(a.get("action") == "RAISE_COASTAL_BARRIERS" for a in context.get("pending_actions", []))
-                ),
+                "applies_to": LOWER_COASTAL_BARRIERS,
+                "condition": "name == 'LOWER_COASTAL_BARRIERS' and 'RAISE_COASTAL_BARRIERS' in pending_action_names(context)",
                 "action": "BLOCK",
                 "reason": "Conflicting barrier actions detected"
             },
             {
                 "id": "emergency_override",
                 "rule": "Allow critical actions even during high energy load if risk is critical",
-                "condition": lambda context, action: (
-                    action.get("priority") == "CRITICAL" and
-                    context.get("energy_load", 0) / 6000 > 0.9
-                ),
+                "applies_to": "*",
+                "condition": "priority == 'CRITICAL' and load > 0.9",
                 "action": "ALLOW",
                 "reason": "Critical risk overrides energy constraints"
             },
             {
                 "id": "aqi_cooling_conflict",
                 "rule": "Don't activate cooling if AQI is critical (cooling may worsen air quality)",
-                "condition": lambda context, action: (
-                    "COOLING" in action.get("action", "") and
-                    context.get("aqi", 0) > 200
-                ),
+                "applies_to": "*COOLING*",
+                "condition": "'COOLING' in name and aqi > 200",
                 "action": "MODIFY",
-                "modification": lambda action: {
-                    **action,
-                    "action": "ACTIVATE_COOLING_WITH_AIR_FILTER",
-                    "reason": action.get("reason", "") + " (with air filtration)"
-                },
+                "modification": self._apply_aqi_modification,
                 "reason": "Cooling activated with air filtration due to high AQI"
             }
         ]
     
+    @staticmethod
+    def _apply_aqi_modification(action: Dict) -> Dict:
+        """Switch a cooling action to its air-filtered variant (mutates and returns the action)"""
+        action["action"] = "ACTIVATE_COOLING_WITH_AIR_FILTER"
+        action["reason"] = action.get("reason", "") + " (with air filtration)"
+        return action
+    
     def _initialize_safety_checks(self) -> List[Dict]:
         """Initialize safety checks"""
         return [
@@ -115,36 +203,8 @@ class PolicyEngine:
             }
         ]
     
-    def validate_action(self, action: Dict, context: Dict) -> Dict:
-        """
-        Validate a single action against policies
-        """
-        violations = []
-        modifications = []
-        
-        for policy in self.policies:
-            if policy["condition"](context, action):
-                if policy["action"] == "BLOCK":
-                    violations.append({
-                        "policy_id": policy["id"],
-                        "rule": policy["rule"],
-                        "reason": policy.get("reason", "Policy violation")
-                    })
-                elif policy["action"] == "DEFER":
-                    return {
-                        "valid": False,
-                        "action": "DEFER",
-                        "reason": policy.get("reason", "Action deferred by policy")
-                    }
-                elif policy["action"] == "MODIFY":
-                    if "modification" in policy:
-                        action = policy["modification"](action)
-                        modifications.append({
-                            "policy_id": policy["id"],
-                            "modification": policy.get("reason", "Action modified by policy")
-                        })
-        
-        # Run safety checks
+    def _evaluate_safety(self, context: Dict):
+        """Run all safety checks against a context, returning (all_safe, results)"""
         safety_results = []
         for check in self.safety_checks:
             if not check["check"](context):
@@ -160,7 +220,48 @@ class PolicyEngine:
                     "message": check["message"]
                 })
         
-        all_safe = all(r["passed"] for r in safety_results)
+        return all(r["passed"] for r in safety_results), safety_results
+    
+    def validate_action(self, action: Dict, context: Dict, fast_fail: bool = False, safety=None, hits=None) -> Dict:
+        """
+        Validate a single action against policies
+        MODIFY policies update the action in place, so pass a copy if the caller's dict must stay intact
+        With fast_fail, returns on the first BLOCK without running the remaining policies or safety checks
+        safety: precomputed (all_safe, results) from _evaluate_safety for this context
+        hits: precomputed policy hits for this action's name and priority in this context
+        """
+        violations = []
+        modifications = []
+        
+        # Conditions of the candidate policies are evaluated together, then applied in policy order
+        if hits is None:
+            hits = self._check_for(action.get("action", ""))(context, action)
+        for idx in hits:
+            policy = self.policies[idx]
+            if policy["action"] == "BLOCK":
+                violations.append({
+                    "policy_id": policy["id"],
+                    "rule": policy["rule"],
+                    "reason": policy.get("reason", "Policy violation")
+                })
+                if fast_fail:
+                    return {"valid": False, "violations": violations, "action": action}
+            elif policy["action"] == "DEFER":
+                return {
+                    "valid": False,
+                    "action": "DEFER",
+                    "reason": policy.get("reason", "Action deferred by policy")
+                }
+            elif policy["action"] == "MODIFY":
+                if "modification" in policy:
+                    action = policy["modification"](action)
+                    modifications.append({
+                        "policy_id": policy["id"],
+                        "modification": policy.get("reason", "Action modified by policy")
+                    })
+        
+        # Safety checks depend only on the context; reuse a batch-level result when given
+        all_safe, safety_results = safety if safety is not None else self._evaluate_safety(context)
         
         return {
             "valid": len(violations) == 0 and all_safe,
@@ -173,11 +274,29 @@ class PolicyEngine:
     def resolve_conflicts(self, actions: List[Dict], context: Dict) -> List[Dict]:
         """
         Resolve conflicts between multiple actions
+        The action dicts are owned by the engine from here on and may be modified in place
         """
-        # Validate each action
+        # Index pending actions once so the barrier policy is a set lookup per action
+        context = {
+            **context,
+            "_pending_action_set": frozenset(a.get("action", "") for a in context.get("pending_actions", []))
+        }
+        
+        # Validate each action (safety checks are loop-invariant, so run them once).
+        # Policy conditions only read the action's name and priority, so hits are
+        # evaluated once per distinct (name, priority) in the batch
+        safety = self._evaluate_safety(context)
+        hits_by_key = {}
         validated_actions = []
         for action in actions:
-            validation = self.validate_action(action, context)
+            _intern_names(action)
+            action["_prio"] = _PRIO.get(action.get("priority", "LOW"), 3)
+            action_name = action.get("action", "")
+            key = (action_name, action.get("priority"))
+            hits = hits_by_key.get(key)
+            if hits is None:
+                hits = hits_by_key[key] = self._check_for(action_name)(context, action)
+            validation = self.validate_action(action, context, fast_fail=True, safety=safety, hits=hits)
             if validation["valid"]:
                 validated_actions.append(validation["action"])
             elif validation.get("action") == "DEFER":
@@ -189,6 +308,13 @@ class PolicyEngine:
         for conflict_rule in self.conflict_rules:
             resolved = conflict_rule["resolve"](resolved, context)
         
+        # The priority stamp is internal to resolution: clear it from the inputs (dropped
+        # actions carry it too) and from the result, which may hold resolver-made copies
+        for action in actions:
+            action.pop("_prio", None)
+        for action in resolved:
+            action.pop("_prio", None)
+        
         return resolved
     
     def _resolve_energy_conflict(self, actions: List[Dict], context: Dict) -> List[Dict]:
@@ -203,20 +329,26 @@ class PolicyEngine:
             return actions
         
         # Prioritize by action priority
-        priority_order = {"CRITICAL": 0, "HIGH": 1, "MEDIUM": 2, "LOW": 3}
-        sorted_actions = sorted(actions, key=lambda x: priority_order.get(x.get("priority", "LOW"), 3))
+        sorted_actions = sorted(actions, key=_by_prio)
         
-        resolved = []
-        cumulative_impact = 0
+        # Everything before the first running total above capacity fits as-is
+        impacts = np.fromiter((a.get("energy_impact_mw", 0) for a in sorted_actions), dtype=float, count=len(sorted_actions))
+        cumulative = np.cumsum(impacts)
+        overflow = np.flatnonzero(cumulative > available)
+        cut = int(overflow[0]) if overflow.size else len(sorted_actions)
         
-        for action in sorted_actions:
+        resolved = sorted_actions[:cut]
+        cumulative_impact = float(cumulative[cut - 1]) if cut else 0
+        
+        # Past the cut, skip actions that don't fit (smaller ones later may still fit)
+        for action in sorted_actions[cut:]:
             impact = action.get("energy_impact_mw", 0)
             if cumulative_impact + impact <= available:
                 resolved.append(action)
                 cumulative_impact += impact
             else:
                 # Modify action to fit within capacity
-                if action.get("priority") == "CRITICAL":
+                if action.get("priority") == CRITICAL:
                     # Reduce scope but keep action
                     modified = {**action, "energy_impact_mw": available - cumulative_impact, "scope_reduced": True}
                     resolved.append(modified)
@@ -226,61 +358,45 @@ class PolicyEngine:
     
     def _resolve_zone_conflict(self, actions: List[Dict], context: Dict) -> List[Dict]:
         """Resolve zone conflicts"""
-        zone_actions = {}
-        
+        # Single pass: keep the highest-priority action per zone (first one wins ties)
+        best = {}
         for action in actions:
             zones = action.get("zones", "unknown")
-            if zones not in zone_actions:
-                zone_actions[zones] = []
-            zone_actions[zones].append(action)
-        
-        resolved = []
-        for zones, zone_actions_list in zone_actions.items():
-            if len(zone_actions_list) == 1:
-                resolved.append(zone_actions_list[0])
-            else:
-                # Multiple actions for same zone - prioritize
-                priority_order = {"CRITICAL": 0, "HIGH": 1, "MEDIUM": 2, "LOW": 3}
-                sorted_zone_actions = sorted(zone_actions_list, key=lambda x: priority_order.get(x.get("priority", "LOW"), 3))
-                resolved.append(sorted_zone_actions[0])  # Take highest priority
+            prio = action["_prio"]
+            current = best.get(zones)
+            if current is None or prio < current[0]:
+                best[zones] = (prio, action)
         
-        return resolved
+        return [action for _, action in best.values()]
     
     def _resolve_action_conflict(self, actions: List[Dict], context: Dict) -> List[Dict]:
         """Resolve conflicting actions (e.g., raise vs lower)"""
-        # Check for conflicting action pairs
-        conflicts = {
-            ("RAISE_COASTAL_BARRIERS", "LOWER_COASTAL_BARRIERS"),
-            ("ACTIVATE_COOLING", "DEACTIVATE_COOLING"),
-        }
-        
-        resolved = []
-        seen_conflicts = set()
-        
-        for action in actions:
+        # Index actions by name once: best priority and first position of each name
+        by_name = {}
+        for position, action in enumerate(actions):
             action_name = action.get("action", "")
-            conflict_found = False
-            
-            for conflict_pair in conflicts:
-                if action_name in conflict_pair:
-                    other_action = [a for a in actions if a.get("action") in conflict_pair and a.get("action") != action_name]
-                    if other_action:
-                        conflict_key = tuple(sorted([action_name, other_action[0].get("action")]))
-                        if conflict_key not in seen_conflicts:
-                            # Resolve by priority
-                            priority_order = {"CRITICAL": 0, "HIGH": 1, "MEDIUM": 2, "LOW": 3}
-                            if priority_order.get(action.get("priority", "LOW"), 3) <= priority_order.get(other_action[0].get("priority", "LOW"), 3):
-                                resolved.append(action)
-                                seen_conflicts.add(conflict_key)
-                                conflict_found = True
-                                break
-            
-            if not conflict_found:
-                resolved.append(action)
+            priority = action["_prio"]
+            best = by_name.get(action_name)
+            if best is None:
+                by_name[action_name] = (priority, position)
+            elif priority < best[0]:
+                by_name[action_name] = (priority, best[1])
         
-        return resolved
+        # For each name whose opponent is also present, drop the lower-priority side
+        # (on a tie the side that appears first wins; both sides agree on the loser)
+        dropped = set()
+        opponent = self._opponent
+        for action_name, rank in by_name.items():
+            opp_rank = by_name.get(opponent.get(action_name))
+            if opp_rank is not None and opp_rank < rank:
+                dropped.add(action_name)
+        
+        if not dropped:
+            return actions
+        return [a for a in actions if a.get("action", "") not in dropped]
 
+@lru_cache(maxsize=1)
 def get_policy_engine() -> PolicyEngine:
-    """Get policy engine instance"""
+    """Get the shared policy engine instance (it holds no per-request state)"""
     return PolicyEngine()
 
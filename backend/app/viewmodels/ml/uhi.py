@@ -8,21 +8,16 @@ def run_uhi_model(satellite_data, city="Mumbai"):
     
     hotspots = detect_hotspots(city, lat, lon)
     
-    features = []
-    for spot in hotspots:
-        features.append({
+    features = [
+        {
             "type": "Feature",
-            "geometry": {
-                "type": "Point",
-                "coordinates": [spot["lon"], spot["lat"]]
-            },
-            "properties": {
-                "hotspot": True,
-                "zone": spot["zone"],
-                "temp": spot["temp"],
-                "type": spot["type"]
-            }
-        })
+            "geometry": {"type": "Point", "coordinates": [spot_lon, spot_lat]},
+            "properties": {"hotspot": True, "zone": zone, "temp": temp, "type": spot_type}
+        }
+        for spot_lon, spot_lat, zone, temp, spot_type in (
+            (spot["lon"], spot["lat"], spot["zone"], spot["temp"], spot["type"]) for spot in hotspots
+        )
+    ]
 
     return {
         "type": "FeatureCollection",
@@ -1,32 +1,41 @@
 import os
+import asyncio
+import inspect
+import hashlib
 from dotenv import load_dotenv
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), '.env'))
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Query, Header
 from fastapi import HTTPException, Response
-from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from typing import List, Dict
 from app.viewmodels.ingestion.openweather import fetch_weather
 from app.viewmodels.ingestion.openweather import fetch_temperature_grid
 from app.viewmodels.ingestion.openweather import fetch_weather_by_coords, reverse_geocode
 from app.viewmodels.ingestion.satellite import fetch_satellite_data
 import requests
+from app.viewmodels.ml._ttl_cache import ttl_cache, no_error
 from app.viewmodels.ml.uhi import run_uhi_model
 from app.viewmodels.ml.flood import run_flood_model
 from app.viewmodels.ml.energy import run_energy_model
 from app.viewmodels.ml.green_simulation import detect_hotspots, simulate_green_interventions, control_cooling_system
 from app.viewmodels.ml.coastal import run_coastal_shield_simulation, get_wave_energy_status
 from app.viewmodels.ml.command_hub import get_command_hub_status, trigger_response
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError, create_model
 
 router = APIRouter()
 
+@router.get("/health")
+async def health():
+    return {"status": "ok"}
+
 @router.get("/uhimap")
 def get_uhi_map(area: str = Query("Mumbai")):
     satellite_data = fetch_satellite_data(area)
     return run_uhi_model(satellite_data, city=area)
 
 @router.get("/weather")
+@ttl_cache(ttl=300, maxsize=64, key=lambda city="Mumbai": city, should_cache=no_error)
 def get_weather(city: str = Query("Mumbai")):
     api_key = os.getenv("OPENWEATHER_API_KEY")
     return fetch_weather(city, api_key)
@@ -48,15 +57,34 @@ def get_hotspots(city: str = Query("Mumbai")):
     return detect_hotspots(city)
 
 
+def _complete_grid(grid) -> bool:
+    """Only cache grids where the lookup and every point came back from OpenWeather (or the keyless synthetic grid)"""
+    return no_error(grid) and all(point.get("source") != "fallback" for point in grid.get("points", []))
+
 @router.get("/temperature-map")
+@ttl_cache(ttl=180, maxsize=64, key=lambda city="Mumbai", grid_size=3, spacing_km=5.0: (city, grid_size, spacing_km), should_cache=_complete_grid)
 def get_temperature_map(city: str = Query("Mumbai"), grid_size: int = Query(3), spacing_km: float = Query(5.0)):
     api_key = os.getenv("OPENWEATHER_API_KEY")
     return fetch_temperature_grid(city, api_key, grid_size=grid_size, spacing_km=spacing_km)
 
 @router.get("/owm-enabled")
-def owm_enabled():
+async def owm_enabled():
     return {"enabled": bool(os.getenv("OPENWEATHER_API_KEY"))}
 
+# Shared keep-alive session so tile fetches reuse the connection to OpenWeather
+_TILE_SESSION = requests.Session()
+_TILE_SESSION.mount("https://", requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=32))
+
+
+@ttl_cache(ttl=3600, maxsize=512, key=lambda layer, z, x, y, api_key: (layer, z, x, y))
+def _fetch_tile(layer: str, z: int, x: int, y: int, api_key: str):
+    """Fetch one tile as (bytes, content type); layers update hourly at most"""
+    tile_url = f"https://tile.openweathermap.org/map/{layer}/{z}/{x}/{y}.png?appid={api_key}"
+    resp = _TILE_SESSION.get(tile_url, timeout=10)
+    resp.raise_for_status()
+    return resp.content, resp.headers.get('Content-Type', 'image/png')
+
+
 @router.get("/temperature-tile/{layer}/{z}/{x}/{y}.png")
 def proxy_temperature_tile(layer: str, z: int, x: int, y: int):
     """Proxy OpenWeather map tiles so the frontend doesn't need the API key."""
@@ -64,11 +92,9 @@ def proxy_temperature_tile(layer: str, z: int, x: int, y: int):
     if not api_key:
         raise HTTPException(status_code=404, detail="OpenWeather API key not configured")
 
-    tile_url = f"https://tile.openweathermap.org/map/{layer}/{z}/{x}/{y}.png?appid={api_key}"
     try:
-        resp = requests.get(tile_url, stream=True, timeout=10)
-        resp.raise_for_status()
-        return StreamingResponse(resp.raw, media_type=resp.headers.get('Content-Type', 'image/png'))
+        content, media_type = _fetch_tile(layer, z, x, y, api_key)
+        return Response(content=content, media_type=media_type)
     except Exception as e:
         raise HTTPException(status_code=502, detail=str(e))
 
@@ -85,10 +111,7 @@ def get_reverse_geocode(lat: float = Query(...), lon: float = Query(...)):
     return reverse_geocode(lat, lon, api_key)
 
 @router.post("/green-simulate")
-def post_green_simulate(city: str = Query("Mumbai"), trees: int = Query(100), reflective_paint: bool = Query(True), green_roofs: bool = Query(True), coastal_barriers: bool = Query(False), lat: float = Query(19.0760), lon: float = Query(72.8777)):
-    hotspots = detect_hotspots(city, lat, lon)
-    simulation_result = simulate_green_interventions(hotspots, trees, reflective_paint, green_roofs, coastal_barriers, lat, lon)
-    
+async def post_green_simulate(city: str = Query("Mumbai"), trees: int = Query(100), reflective_paint: bool = Query(True), green_roofs: bool = Query(True), coastal_barriers: bool = Query(False), lat: float = Query(19.0760), lon: float = Query(72.8777)):
     # Add carbon and cost analysis
     from app.viewmodels.ml.carbon_tracker import calculate_carbon_offset
     from app.viewmodels.ml.cost_benefit import calculate_intervention_cba
@@ -98,28 +121,42 @@ def post_green_simulate(city: str = Query("Mumbai"), trees: int = Query(100), re
     roof_area = 500.0 if green_roofs else 0.0
     barrier_count = 5 if coastal_barriers else 0
     
-    # Calculate carbon offset
-    carbon_data = calculate_carbon_offset({
-        "trees": trees,
-        "reflective_paint_area": paint_area,
-        "green_roof_area": roof_area,
-        "coastal_barriers": barrier_count
-    })
+    def simulate():
+        hotspots = detect_hotspots(city, lat, lon)
+        return simulate_green_interventions(hotspots, trees, reflective_paint, green_roofs, coastal_barriers, lat, lon)
     
-    # Calculate cost-benefit for each intervention
-    cba_results = []
-    if trees > 0:
-        cba_results.append(calculate_intervention_cba("tree", trees))
-    if reflective_paint:
-        cba_results.append(calculate_intervention_cba("reflective_paint", 0, area=paint_area))
-    if green_roofs:
-        cba_results.append(calculate_intervention_cba("green_roof", 0, area=roof_area))
-    if coastal_barriers:
-        cba_results.append(calculate_intervention_cba("coastal_barrier", barrier_count))
+    def analyse():
+        # Calculate carbon offset
+        carbon_data = calculate_carbon_offset({
+            "trees": trees,
+            "reflective_paint_area": paint_area,
+            "green_roof_area": roof_area,
+            "coastal_barriers": barrier_count
+        })
+        
+        # Calculate cost-benefit for each intervention
+        cba_results = []
+        if trees > 0:
+            cba_results.append(calculate_intervention_cba("tree", trees))
+        if reflective_paint:
+            cba_results.append(calculate_intervention_cba("reflective_paint", 0, area=paint_area))
+        if green_roofs:
+            cba_results.append(calculate_intervention_cba("green_roof", 0, area=roof_area))
+        if coastal_barriers:
+            cba_results.append(calculate_intervention_cba("coastal_barrier", barrier_count))
+        return carbon_data, cba_results
+    
+    # The analysis doesn't depend on the simulation, so it runs while the hotspot lookup waits on OpenWeather
+    simulation_result, (carbon_data, cba_results) = await asyncio.gather(
+        run_in_threadpool(simulate),
+        run_in_threadpool(analyse)
+    )
     
     # Aggregate CBA
-    total_cost = sum(cba["initial_cost_usd"] for cba in cba_results)
-    total_npv = sum(cba["npv_usd"] for cba in cba_results)
+    total_cost = total_npv = 0
+    for cba in cba_results:
+        total_cost += cba["initial_cost_usd"]
+        total_npv += cba["npv_usd"]
     total_roi = ((total_npv - total_cost) / total_cost * 100) if total_cost > 0 else 0
     
     simulation_result["carbon_analysis"] = carbon_data
@@ -300,6 +337,63 @@ class DecisionExecutionRequest(BaseModel):
 def post_execute_decision(req: DecisionExecutionRequest):
     return execute_automated_decision(req.decision_id, req.approve)
 
+# Batch endpoint: several ML calls in one request (keyed by the same paths as the routes above)
+def _batch_handler(route_func):
+    """
+    Wrap a route function so a batch item's params are validated against the route's own
+    signature (types and Query defaults), or its request model for JSON-body routes
+    """
+    params = list(inspect.signature(route_func).parameters.values())
+    body_model = params[0].annotation if len(params) == 1 else None
+    if isinstance(body_model, type) and issubclass(body_model, BaseModel):
+        return lambda p: route_func(body_model(**p))
+    
+    query_model = create_model(
+        f"{route_func.__name__}_params",
+        **{param.name: (param.annotation, getattr(param.default, "default", param.default)) for param in params}
+    )
+    return lambda p: route_func(**dict(query_model(**p)))
+
+_ML_BATCH_HANDLERS = {
+    path: _batch_handler(route_func)
+    for path, route_func in {
+        "/ml/forecast/temperature": get_temperature_forecast,
+        "/ml/forecast/flood": get_flood_forecast,
+        "/ml/forecast/energy": get_energy_forecast_ml,
+        "/ml/anomalies/temperature": get_temperature_anomalies,
+        "/ml/anomalies/rainfall": get_rainfall_anomalies,
+        "/ml/anomalies/energy": get_energy_anomalies,
+        "/ml/auto-decisions": get_auto_decisions,
+        "/ai/recommendations": get_ai_recommendations,
+        "/carbon/calculate": post_carbon_calculate,
+    }.items()
+}
+
+class MLBatchItem(BaseModel):
+    name: str
+    path: str
+    params: Dict = {}
+
+class MLBatchRequest(BaseModel):
+    requests: List[MLBatchItem]
+
+@router.post("/ml/batch")
+def post_ml_batch(req: MLBatchRequest):
+    """Run several ML calls in one round trip; each item reports its own status"""
+    results = {}
+    for item in req.requests:
+        handler = _ML_BATCH_HANDLERS.get(item.path)
+        if handler is None:
+            results[item.name] = {"status": 404, "error": f"Unsupported path: {item.path}"}
+            continue
+        try:
+            results[item.name] = {"status": 200, "result": handler(item.params)}
+        except ValidationError as e:
+            results[item.name] = {"status": 422, "error": str(e)}
+        except Exception as e:
+            results[item.name] = {"status": 500, "error": str(e)}
+    return {"results": results}
+
 # Hazard Timeline Endpoint
 @router.get("/ml/hazard-timeline")
 def get_hazard_timeline(
@@ -334,11 +428,15 @@ def get_scenario_result(
 ):
     return run_scenario(scenario_name, region)
 
+@ttl_cache(ttl=5, maxsize=16, key=lambda region="Anand Vihar": region)
+def _get_twin_state(region: str = "Anand Vihar"):
+    """Projection-free twin snapshot shared by back-to-back polls (read-only)"""
+    from app.viewmodels.digital_twin.digital_twin_engine import DigitalTwinEngine
+    return DigitalTwinEngine(region).generate_state(include_projections=False)
+
 @router.get("/digital-twin/heatmap")
 def get_dynamic_heatmap(region: str = Query("Anand Vihar")):
-    from app.viewmodels.digital_twin.digital_twin_engine import DigitalTwinEngine
-    engine = DigitalTwinEngine(region)
-    state = engine.generate_state(include_projections=False)
+    state = _get_twin_state(region)
     zones = state.get("zones", [])
     sensors = state.get("sensors", [])
     return generate_dynamic_heatmap(zones, sensors)
@@ -349,46 +447,53 @@ def get_wind_flow(
     wind_speed: float = Query(5.0),
     wind_direction: float = Query(270)
 ):
-    from app.viewmodels.digital_twin.digital_twin_engine import DigitalTwinEngine
-    engine = DigitalTwinEngine(region)
-    state = engine.generate_state(include_projections=False)
+    state = _get_twin_state(region)
     zones = state.get("zones", [])
     return generate_wind_flow_simulation(zones, wind_speed, wind_direction)
 
+# Static 3D model files are read once at import and served as raw bytes
+_MODEL_DIR = os.path.join(os.path.dirname(__file__), "..", "viewmodels", "digital_twin", "3d_model")
+
+
+def _load_static_json(filename):
+    with open(os.path.join(_MODEL_DIR, filename), "rb") as f:
+        content = f.read()
+    return content, '"%s"' % hashlib.sha1(content).hexdigest()
+
+
+_STATIC_JSON = {
+    "3d": _load_static_json("anand_vihar_layout.json"),
+    "bld": _load_static_json("building_heights.json"),
+    "rd": _load_static_json("roads_and_flows.json"),
+}
+
+
+def _static_json_response(name, if_none_match):
+    content, etag = _STATIC_JSON[name]
+    if if_none_match == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=content, media_type="application/json", headers={"ETag": etag})
+
 @router.get("/digital-twin/3d-model")
-def get_3d_model():
-    import json
-    import os
-    model_path = os.path.join(os.path.dirname(__file__), "..", "viewmodels", "digital_twin", "3d_model", "anand_vihar_layout.json")
-    with open(model_path, 'r') as f:
-        return json.load(f)
+async def get_3d_model(if_none_match: str = Header(None)):
+    return _static_json_response("3d", if_none_match)
 
 @router.get("/digital-twin/buildings")
-def get_buildings():
-    import json
-    import os
-    model_path = os.path.join(os.path.dirname(__file__), "..", "viewmodels", "digital_twin", "3d_model", "building_heights.json")
-    with open(model_path, 'r') as f:
-        return json.load(f)
+async def get_buildings(if_none_match: str = Header(None)):
+    return _static_json_response("bld", if_none_match)
 
 @router.get("/digital-twin/roads")
-def get_roads():
-    import json
-    import os
-    model_path = os.path.join(os.path.dirname(__file__), "..", "viewmodels", "digital_twin", "3d_model", "roads_and_flows.json")
-    with open(model_path, 'r') as f:
-        return json.load(f)
+async def get_roads(if_none_match: str = Header(None)):
+    return _static_json_response("rd", if_none_match)
 
 class ActionSimulationRequest(BaseModel):
     actions: List[Dict]
 
 @router.post("/digital-twin/simulate-actions")
 def post_simulate_actions(req: ActionSimulationRequest):
-    from app.viewmodels.digital_twin.digital_twin_engine import DigitalTwinEngine
     from app.viewmodels.digital_twin.orchestrator.action_simulator import ActionSimulator
     
-    engine = DigitalTwinEngine()
-    state = engine.generate_state(include_projections=False)
+    state = _get_twin_state()
     
     simulator = ActionSimulator()
     return simulator.simulate_multiple_actions(req.actions, state)
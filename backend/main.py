@@ -1,8 +1,27 @@
+from contextlib import asynccontextmanager
+
+import anyio.to_thread
+import orjson
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.views.routes import router as api_router
 
-app = FastAPI(title="Indradhanu Backend")
+class ORJSONResponse(JSONResponse):
+	"""Render responses with orjson (numpy scalars/arrays and non-str keys included)"""
+	def render(self, content) -> bytes:
+		return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+# Sync routes (OpenWeather calls, ML models) run on the anyio worker pool; its default
+# of 40 threads queues concurrent frontend polls behind slow upstream requests
+THREADPOOL_SIZE = 100
+
+@asynccontextmanager
+async def lifespan(app):
+	anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+	yield
+
+app = FastAPI(title="Indradhanu Backend", default_response_class=ORJSONResponse, lifespan=lifespan)
 
 # CORS: allow local frontend during development to make preflight (OPTIONS) requests
 origins = [
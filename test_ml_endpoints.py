@@ -1,75 +1,141 @@
 """
 Quick test script for new ML endpoints
 Run this to verify all ML features are working
+(pass --batch to send every probe in a single /api/ml/batch request)
 """
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qsl
 import requests
-import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import orjson
 
 BASE_URL = "http://localhost:8000/api"
 
-def test_endpoint(name, url, method="GET", data=None):
-    """Test an API endpoint"""
+# (connect, read) timeouts: a down backend fails fast, slow model inference keeps its read budget
+PROBE_TIMEOUT = (1.0, 5.0)
+BATCH_TIMEOUT = (1.0, 30.0)
+
+# (name, url, method, json body) for every probe
+ENDPOINTS = [
+    ("Temperature Forecast", f"{BASE_URL}/ml/forecast/temperature?city=Mumbai&hours_ahead=48", "GET", None),
+    ("Flood Forecast", f"{BASE_URL}/ml/forecast/flood?city=Mumbai&hours_ahead=72", "GET", None),
+    ("Energy Forecast", f"{BASE_URL}/ml/forecast/energy?city=Mumbai&hours_ahead=24", "GET", None),
+    ("Temperature Anomalies", f"{BASE_URL}/ml/anomalies/temperature?city=Mumbai&hours_back=48", "GET", None),
+    ("Rainfall Anomalies", f"{BASE_URL}/ml/anomalies/rainfall?city=Mumbai&hours_back=72", "GET", None),
+    ("Energy Anomalies", f"{BASE_URL}/ml/anomalies/energy?city=Mumbai&hours_back=24", "GET", None),
+    ("Auto Decisions", f"{BASE_URL}/ml/auto-decisions?city=Mumbai", "GET", None),
+    ("AI Recommendations", f"{BASE_URL}/ai/recommendations?city=Mumbai", "GET", None),
+    ("Carbon Calculate", f"{BASE_URL}/carbon/calculate", "POST", {
+        "trees": 100,
+        "reflective_paint_area": 1000,
+        "green_roof_area": 500
+    }),
+]
+
+def make_session():
+    """
+    Session with a keep-alive pool so every probe reuses the connection to the backend
+    (one retry, POST included, covers a pooled socket the server closed, e.g. after a 500)
+    """
+    session = requests.Session()
+    # Every probe targets the same origin: one host pool, capped so concurrent probes
+    # wait for a pooled keep-alive socket instead of opening throwaway connections
+    # (uvicorn speaks HTTP/1.1 only, so this is as close to multiplexing as it gets)
+    session.mount("http://", HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=20,
+        pool_block=True,
+        max_retries=Retry(total=1, allowed_methods=None)
+    ))
+    return session
+
+def warm_up(session):
+    """Open the pooled keep-alive connection before probing so probe #1 doesn't pay for it"""
+    try:
+        session.get(f"{BASE_URL}/health", timeout=PROBE_TIMEOUT)
+    except requests.exceptions.RequestException:
+        pass  # an unreachable backend is reported by the probes themselves
+
+def test_endpoint(session, name, url, method="GET", data=None):
+    """Test an API endpoint, returning (success, report lines) instead of printing"""
     try:
         if method == "GET":
-            response = requests.get(url, timeout=5)
+            response = session.get(url, timeout=PROBE_TIMEOUT)
         else:
-            response = requests.post(url, json=data, timeout=5)
+            response = session.post(url, data=orjson.dumps(data), headers={"Content-Type": "application/json"}, timeout=PROBE_TIMEOUT)
         
         if response.status_code == 200:
-            result = response.json()
-            print(f"[OK] {name}: SUCCESS")
-            print(f"   Response keys: {list(result.keys())[:5]}...")
-            return True
+            result = orjson.loads(response.content)
+            return True, f"[OK] {name}: SUCCESS\n   Response keys: {list(result.keys())[:5]}..."
         else:
-            print(f"[FAIL] {name}: FAILED (Status {response.status_code})")
-            print(f"   Error: {response.text[:100]}")
-            return False
+            return False, (f"[FAIL] {name}: FAILED (Status {response.status_code})\n"
+                           f"   Error: {response.content[:100].decode('utf-8', 'replace')}")
     except requests.exceptions.ConnectionError:
-        print(f"[WARN] {name}: Backend not running (Connection refused)")
-        return False
+        return False, f"[WARN] {name}: Backend not running (Connection refused)"
     except Exception as e:
-        print(f"[ERROR] {name}: ERROR - {str(e)[:100]}")
-        return False
+        return False, f"[ERROR] {name}: ERROR - {str(e)[:100]}"
 
-def main():
-    print("Testing ML Endpoints...\n")
+def test_batch(session):
+    """Send every probe in one /ml/batch request; returns a (success, report lines) pair per probe"""
+    api_path = urlsplit(BASE_URL).path
+    items = []
+    for name, url, method, data in ENDPOINTS:
+        parts = urlsplit(url)
+        params = data if method == "POST" else dict(parse_qsl(parts.query))
+        items.append({"name": name, "path": parts.path[len(api_path):], "params": params})
     
-    endpoints = [
-        ("Temperature Forecast", f"{BASE_URL}/ml/forecast/temperature?city=Mumbai&hours_ahead=48"),
-        ("Flood Forecast", f"{BASE_URL}/ml/forecast/flood?city=Mumbai&hours_ahead=72"),
-        ("Energy Forecast", f"{BASE_URL}/ml/forecast/energy?city=Mumbai&hours_ahead=24"),
-        ("Temperature Anomalies", f"{BASE_URL}/ml/anomalies/temperature?city=Mumbai&hours_back=48"),
-        ("Rainfall Anomalies", f"{BASE_URL}/ml/anomalies/rainfall?city=Mumbai&hours_back=72"),
-        ("Energy Anomalies", f"{BASE_URL}/ml/anomalies/energy?city=Mumbai&hours_back=24"),
-        ("Auto Decisions", f"{BASE_URL}/ml/auto-decisions?city=Mumbai"),
-        ("AI Recommendations", f"{BASE_URL}/ai/recommendations?city=Mumbai"),
-        ("Carbon Calculate", f"{BASE_URL}/carbon/calculate", "POST", {
-            "trees": 100,
-            "reflective_paint_area": 1000,
-            "green_roof_area": 500
-        }),
-    ]
+    try:
+        response = session.post(
+            f"{BASE_URL}/ml/batch",
+            data=orjson.dumps({"requests": items}),
+            headers={"Content-Type": "application/json"},
+            timeout=BATCH_TIMEOUT
+        )
+        response.raise_for_status()
+        outcomes = orjson.loads(response.content)["results"]
+    except requests.exceptions.ConnectionError:
+        return [(False, f"[WARN] {name}: Backend not running (Connection refused)") for name, *_ in ENDPOINTS]
+    except Exception as e:
+        return [(False, f"[ERROR] {name}: Batch ERROR - {str(e)[:100]}") for name, *_ in ENDPOINTS]
     
     results = []
-    for name, url, *rest in endpoints:
-        method = rest[0] if rest else "GET"
-        data = rest[1] if len(rest) > 1 else None
-        success = test_endpoint(name, url, method, data)
-        results.append(success)
-        print()
+    for name, *_ in ENDPOINTS:
+        outcome = outcomes.get(name, {"status": None, "error": "missing from batch response"})
+        if outcome["status"] == 200:
+            results.append((True, f"[OK] {name}: SUCCESS\n   Response keys: {list(outcome['result'].keys())[:5]}..."))
+        else:
+            results.append((False, f"[FAIL] {name}: FAILED (Status {outcome['status']})\n   Error: {outcome['error'][:100]}"))
+    return results
+
+def main(batch=False):
+    with make_session() as session:
+        warm_up(session)
+        if batch:
+            # One round trip for all probes
+            results = test_batch(session)
+        else:
+            # Probes are independent, so run them all at once over the shared session
+            # (its pool holds enough keep-alive sockets for one per worker)
+            with ThreadPoolExecutor(max_workers=len(ENDPOINTS)) as executor:
+                results = list(executor.map(lambda endpoint: test_endpoint(session, *endpoint), ENDPOINTS))
     
-    # Summary
-    passed = sum(results)
+    # Build the whole report (in ENDPOINTS order) and write it once
+    passed = sum(ok for ok, _ in results)
     total = len(results)
-    print(f"\nSummary: {passed}/{total} endpoints working")
-    
     if passed == total:
-        print("[SUCCESS] All ML endpoints are working!")
+        verdict = "[SUCCESS] All ML endpoints are working!"
     elif passed > 0:
-        print("[WARN] Some endpoints need attention")
+        verdict = "[WARN] Some endpoints need attention"
     else:
-        print("[ERROR] Backend may not be running. Start it with: cd backend && python -m uvicorn main:app --reload")
+        verdict = "[ERROR] Backend may not be running. Start it with: cd backend && python -m uvicorn main:app --reload"
+    
+    report = ["Testing ML Endpoints...\n"]
+    report.extend(lines + "\n" for _, lines in results)
+    report.append(f"\nSummary: {passed}/{total} endpoints working\n{verdict}\n")
+    sys.stdout.write("\n".join(report))
 
 if __name__ == "__main__":
-    main()
+    main(batch="--batch" in sys.argv)
 